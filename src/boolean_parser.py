@@ -1,14 +1,32 @@
 import re
 from abc import ABC, abstractmethod
-from typing import List
+from functools import cached_property, lru_cache
+from typing import Callable, List
+
+_TOKEN_RE = re.compile(r"(\(|\)|AND|OR|NOT|[^\s()]+)", re.IGNORECASE)
+_IS_BOOL_RE = re.compile(r"[()]|\b(?:AND|OR|NOT)\b", re.IGNORECASE)
 
 
 class BooleanExpression(ABC):
     """ブール式の抽象基底クラス"""
 
-    @abstractmethod
     def evaluate(self, text: str) -> bool:
-        """テキストに対してブール式を評価する"""
+        """テキストに対してブール式を評価する（小文字化はテキスト全体で1回だけ行う）"""
+        return self.matcher(text.lower())
+
+    @cached_property
+    def matcher(self) -> Callable[[str], bool]:
+        """コンパイル済みのクロージャ（初回アクセス時に生成）"""
+        return self.compile()
+
+    @abstractmethod
+    def compile(self) -> Callable[[str], bool]:
+        """小文字化済みのテキストを評価するクロージャにコンパイルする"""
+        pass
+
+    @abstractmethod
+    def collect_keywords(self) -> List[str]:
+        """式に含まれるキーワード（小文字化済み）を列挙する"""
         pass
 
 
@@ -17,40 +35,60 @@ class Keyword(BooleanExpression):
 
     def __init__(self, keyword: str):
         self.keyword = keyword.strip()
+        # 評価のたびに小文字化しないよう構築時に一度だけ計算しておく
+        self._needle = self.keyword.lower()
 
-    def evaluate(self, text: str) -> bool:
-        return self.keyword.lower() in text.lower()
+    def compile(self) -> Callable[[str], bool]:
+        needle = self._needle
+        return lambda text: needle in text
+
+    def collect_keywords(self) -> List[str]:
+        return [self._needle]
 
     def __repr__(self) -> str:
         return f"Keyword('{self.keyword}')"
 
 
 class AndExpression(BooleanExpression):
-    """AND演算を表現するクラス"""
+    """AND演算を表現するクラス（連続するANDは1つのノードにまとめる）"""
 
-    def __init__(self, left: BooleanExpression, right: BooleanExpression):
-        self.left = left
-        self.right = right
+    def __init__(self, operands: List[BooleanExpression]):
+        self.operands = operands
 
-    def evaluate(self, text: str) -> bool:
-        return self.left.evaluate(text) and self.right.evaluate(text)
+    def compile(self) -> Callable[[str], bool]:
+        matchers = [operand.compile() for operand in self.operands]
+        return lambda text: all(matcher(text) for matcher in matchers)
+
+    def collect_keywords(self) -> List[str]:
+        return [
+            keyword
+            for operand in self.operands
+            for keyword in operand.collect_keywords()
+        ]
 
     def __repr__(self) -> str:
-        return f"({self.left} AND {self.right})"
+        return "(" + " AND ".join(map(repr, self.operands)) + ")"
 
 
 class OrExpression(BooleanExpression):
-    """OR演算を表現するクラス"""
+    """OR演算を表現するクラス（連続するORは1つのノードにまとめる）"""
 
-    def __init__(self, left: BooleanExpression, right: BooleanExpression):
-        self.left = left
-        self.right = right
+    def __init__(self, operands: List[BooleanExpression]):
+        self.operands = operands
 
-    def evaluate(self, text: str) -> bool:
-        return self.left.evaluate(text) or self.right.evaluate(text)
+    def compile(self) -> Callable[[str], bool]:
+        matchers = [operand.compile() for operand in self.operands]
+        return lambda text: any(matcher(text) for matcher in matchers)
+
+    def collect_keywords(self) -> List[str]:
+        return [
+            keyword
+            for operand in self.operands
+            for keyword in operand.collect_keywords()
+        ]
 
     def __repr__(self) -> str:
-        return f"({self.left} OR {self.right})"
+        return "(" + " OR ".join(map(repr, self.operands)) + ")"
 
 
 class NotExpression(BooleanExpression):
@@ -59,8 +97,12 @@ class NotExpression(BooleanExpression):
     def __init__(self, operand: BooleanExpression):
         self.operand = operand
 
-    def evaluate(self, text: str) -> bool:
-        return not self.operand.evaluate(text)
+    def compile(self) -> Callable[[str], bool]:
+        operand = self.operand.compile()
+        return lambda text: not operand(text)
+
+    def collect_keywords(self) -> List[str]:
+        return self.operand.collect_keywords()
 
     def __repr__(self) -> str:
         return f"NOT {self.operand}"
@@ -75,17 +117,17 @@ class BooleanParser:
 
     def parse(self, expression: str) -> BooleanExpression:
         """ブール式文字列をパースする"""
-        # トークン化
-        self.tokens = self._tokenize(expression)
+        # トークン化（末尾に番兵の None を置き、読み出し時の範囲チェックを省く）
+        self.tokens = self._tokenize(expression) + [None]
         self.position = 0
 
         # 構文解析
-        if not self.tokens:
+        if self.tokens[0] is None:
             raise ValueError("空の検索式です")
 
         result = self._parse_or()
 
-        if self.position < len(self.tokens):
+        if self.tokens[self.position] is not None:
             raise ValueError(f"予期しないトークン: {self.tokens[self.position]}")
 
         return result
@@ -94,8 +136,7 @@ class BooleanParser:
         """文字列をトークンに分割する"""
         # 正規表現でトークンを抽出
         # キーワード、演算子、括弧を識別
-        token_pattern = r"(\(|\)|AND|OR|NOT|[^\s()]+)"
-        tokens = re.findall(token_pattern, expression, re.IGNORECASE)
+        tokens = _TOKEN_RE.findall(expression)
 
         # 大小文字を正規化（演算子のみ）
         normalized_tokens = []
@@ -109,40 +150,35 @@ class BooleanParser:
         return normalized_tokens
 
     def _current_token(self) -> str:
-        """現在のトークンを取得"""
-        if self.position < len(self.tokens):
-            return self.tokens[self.position]
-        return None
+        """現在のトークンを取得（終端では番兵の None を返す）"""
+        return self.tokens[self.position]
 
     def _consume_token(self) -> str:
         """現在のトークンを消費して次に進む"""
-        if self.position < len(self.tokens):
-            token = self.tokens[self.position]
+        token = self.tokens[self.position]
+        if token is not None:
             self.position += 1
-            return token
-        return None
+        return token
 
     def _parse_or(self) -> BooleanExpression:
         """OR演算子をパースする（最低優先度）"""
-        left = self._parse_and()
+        operands = [self._parse_and()]
 
-        while self._current_token() == "OR":
+        while self.tokens[self.position] == "OR":
             self._consume_token()  # OR を消費
-            right = self._parse_and()
-            left = OrExpression(left, right)
+            operands.append(self._parse_and())
 
-        return left
+        return operands[0] if len(operands) == 1 else OrExpression(operands)
 
     def _parse_and(self) -> BooleanExpression:
         """AND演算子をパースする（中間優先度）"""
-        left = self._parse_not()
+        operands = [self._parse_not()]
 
-        while self._current_token() == "AND":
+        while self.tokens[self.position] == "AND":
             self._consume_token()  # AND を消費
-            right = self._parse_not()
-            left = AndExpression(left, right)
+            operands.append(self._parse_not())
 
-        return left
+        return operands[0] if len(operands) == 1 else AndExpression(operands)
 
     def _parse_not(self) -> BooleanExpression:
         """NOT演算子をパースする（高優先度）"""
@@ -176,31 +212,39 @@ class BooleanParser:
         return Keyword(keyword)
 
 
+@lru_cache(maxsize=128)
 def parse_boolean_expression(expression: str) -> BooleanExpression:
     """ブール式文字列をパースしてBooleanExpressionオブジェクトを返す
 
-    簡単なファクトリー関数として提供
+    簡単なファクトリー関数として提供（同じ式は再パースせずキャッシュした結果を返す）
     """
     parser = BooleanParser()
     return parser.parse(expression)
 
 
+@lru_cache(maxsize=128)
+def compile_matcher(expression: BooleanExpression) -> Callable[[str], bool]:
+    """小文字化済みのテキストを評価するマッチャーを生成する
+
+    いずれかのキーワードを含むかを正規表現で先に判定し、含まないテキストは式を評価せずに除外する
+    （同じ式オブジェクトには生成済みのマッチャーを返す）
+    """
+    matcher = expression.matcher
+    if matcher(""):
+        # どのキーワードも含まないテキストに一致しうる式（NOT など）は事前判定できない
+        return matcher
+
+    # どのキーワードも含まないテキストを1回の走査で除外してから式を評価する
+    needles = list(dict.fromkeys(expression.collect_keywords()))
+    prefilter = re.compile("|".join(map(re.escape, needles))).search
+    return lambda text: prefilter(text) is not None and matcher(text)
+
+
+@lru_cache(maxsize=128)
 def is_boolean_expression(expression: str) -> bool:
     """文字列がブール式かどうかを判定する
 
     AND, OR, NOT, 括弧のいずれかが含まれている場合はブール式とみなす
     """
-    upper_expr = expression.upper()
-    # 括弧があるかチェック
-    if "(" in upper_expr or ")" in upper_expr:
-        return True
-    
-    # 演算子をワード境界を考慮してチェック
-    import re
-    operators = ["AND", "OR", "NOT"]
-    for op in operators:
-        # ワード境界を使用して演算子を検出
-        if re.search(r'\b' + op + r'\b', upper_expr):
-            return True
-    
-    return False
+    # 括弧または演算子（ワード境界を考慮）を1回の走査で検出
+    return _IS_BOOL_RE.search(expression) is not None
@@ -1,6 +1,21 @@
 import json
+import re
+import sqlite3
 from datetime import datetime
 from pathlib import Path
+from typing import NamedTuple
+
+# Spotify のアーティストID（base62 の22文字）
+_SPOTIFY_ID_RE = re.compile(r"[0-9A-Za-z]{22}")
+
+
+class TrackEntry(NamedTuple):
+    """楽曲情報（タプルとしてもインデックスで参照できる）"""
+
+    id: str
+    name: str
+    release_date: str
+    album_id: str | None
 
 
 class CacheManager:
@@ -8,57 +23,152 @@ class CacheManager:
 
     def __init__(self, cache_dir: str = ".track_cache"):
         self.cache_dir = Path(cache_dir)
+        self.cache_path = self.cache_dir / "tracks.db"
         self._ensure_cache_dir()
+        self._conn = self._open_database()
 
     def _ensure_cache_dir(self):
         """キャッシュディレクトリを作成"""
         self.cache_dir.mkdir(parents=True, exist_ok=True)
 
-    def _get_cache_path(self, artist_id: str) -> Path:
-        """キャッシュファイルのパスを取得"""
-        return self.cache_dir / f"{artist_id}.json"
+    def _open_database(self) -> sqlite3.Connection:
+        """キャッシュデータベースを開く（開けない場合は作り直すか、メモリ上で動作する）"""
+        if not self.cache_path.exists():
+            self._remove_legacy_cache_files()
 
-    def _is_cache_valid(self, cache_path: Path) -> bool:
-        """キャッシュが有効かチェック"""
-        return cache_path.exists()
+        try:
+            return self._connect(self.cache_path)
+        except sqlite3.OperationalError as e:
+            # ロック中など一時的な問題では既存のキャッシュを消さず、今回は保存しない
+            print(f"⚠️  キャッシュを開けないため、今回はキャッシュを保存せずに実行します: {e}")
+            return self._connect(":memory:")
+        except sqlite3.DatabaseError as e:
+            print(f"⚠️  キャッシュが破損しているため作り直します: {e}")
 
-    def save_tracks(
-        self, artist_id: str, tracks: list[tuple[str, str, str, str | None]]
-    ):
-        """楽曲情報をキャッシュに保存"""
-        cache_path = self._get_cache_path(artist_id)
+        try:
+            for path in self.cache_dir.glob(f"{self.cache_path.name}*"):
+                path.unlink()
+            return self._connect(self.cache_path)
+        except (sqlite3.DatabaseError, OSError) as e:
+            print(f"⚠️  キャッシュを作り直せないため、今回はキャッシュを保存せずに実行します: {e}")
+            return self._connect(":memory:")
 
-        cache_data = {
-            "artist_id": artist_id,
-            "last_updated": datetime.now().isoformat(),
-            "tracks": tracks,
-        }
+    def _remove_legacy_cache_files(self):
+        """以前の形式（アーティストごとの JSON ファイル）のキャッシュを削除"""
+        # キャッシュディレクトリには利用者のファイルが置かれうるため、
+        # アーティストIDの名前で以前のキャッシュの内容を持つファイルだけを消す
+        for legacy_path in self.cache_dir.glob("*.json"):
+            if not _SPOTIFY_ID_RE.fullmatch(legacy_path.stem):
+                continue
+            try:
+                cache_data = json.loads(legacy_path.read_bytes())
+            except (OSError, ValueError):
+                continue
+            if (
+                isinstance(cache_data, dict)
+                and cache_data.get("artist_id") == legacy_path.stem
+                and "tracks" in cache_data
+            ):
+                legacy_path.unlink(missing_ok=True)
 
-        cache_path.write_text(
-            json.dumps(cache_data, ensure_ascii=False, indent=2), encoding="utf-8"
+    def _connect(self, database: Path | str) -> sqlite3.Connection:
+        """キャッシュ用の SQLite データベースに接続し、テーブルを用意する"""
+        conn = sqlite3.connect(database, isolation_level=None)
+        conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS artists (
+                artist_id TEXT PRIMARY KEY,
+                last_updated TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS tracks (
+                artist_id TEXT NOT NULL,
+                track_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                release_date TEXT NOT NULL,
+                album_id TEXT,
+                PRIMARY KEY (artist_id, track_id)
+            );
+            -- アルバムID集合は楽曲全体を走査せずに読めるよう別テーブルに保持する
+            CREATE TABLE IF NOT EXISTS albums (
+                artist_id TEXT NOT NULL,
+                album_id TEXT NOT NULL,
+                PRIMARY KEY (artist_id, album_id)
+            );
+            """
         )
+        return conn
+
+    def save_tracks(self, artist_id: str, tracks: list[TrackEntry]):
+        """楽曲情報をキャッシュに保存（既存の楽曲は上書き）"""
+        # 楽曲と更新日時を1つのトランザクションで書き込み、途中で中断されても
+        # 一部だけ保存されたキャッシュが有効とみなされないようにする
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                """
+                INSERT INTO tracks (artist_id, track_id, name, release_date, album_id)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (artist_id, track_id) DO UPDATE SET
+                    name = excluded.name,
+                    release_date = excluded.release_date,
+                    album_id = excluded.album_id
+                """,
+                ((artist_id, *track) for track in tracks),
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO albums (artist_id, album_id) VALUES (?, ?)",
+                (
+                    (artist_id, album_id)
+                    for album_id in {track[3] for track in tracks if track[3]}
+                ),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO artists (artist_id, last_updated) VALUES (?, ?)",
+                (artist_id, datetime.now().isoformat()),
+            )
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
 
     def load_tracks(
         self, artist_id: str
-    ) -> tuple[list[tuple[str, str, str, str | None]], str] | None:
+    ) -> tuple[list[TrackEntry], str] | None:
         """キャッシュから楽曲情報を読み込み、(tracks, last_updated) を返す"""
-        cache_path = self._get_cache_path(artist_id)
-
-        if not self._is_cache_valid(cache_path):
+        row = self._conn.execute(
+            "SELECT last_updated FROM artists WHERE artist_id = ?", (artist_id,)
+        ).fetchone()
+        if row is None:
             return None
 
-        try:
-            cache_data = json.loads(cache_path.read_text(encoding="utf-8"))
-            tracks = [tuple(track) for track in cache_data["tracks"]]
-            last_updated = cache_data.get("last_updated", "1900-01-01T00:00:00")
-            return tracks, last_updated
-        except (json.JSONDecodeError, KeyError, FileNotFoundError):
-            return None
+        # 保存順（rowid）を第2キーにして、同じリリース日の楽曲の並びを保つ
+        cursor = self._conn.execute(
+            """
+            SELECT track_id, name, release_date, album_id FROM tracks
+            WHERE artist_id = ?
+            ORDER BY release_date, rowid
+            """,
+            (artist_id,),
+        )
+        return list(map(TrackEntry._make, cursor)), row[0]
+
+    def load_album_ids(self, artist_id: str) -> set[str]:
+        """キャッシュ済みのアルバムID集合を読み込む"""
+        cursor = self._conn.execute(
+            "SELECT album_id FROM albums WHERE artist_id = ?", (artist_id,)
+        )
+        return {album_id for (album_id,) in cursor}
 
     def clear_cache(self):
         """キャッシュディレクトリを削除"""
         import shutil
 
+        self._conn.close()
         if self.cache_dir.exists():
             shutil.rmtree(self.cache_dir)
             print(f"🗑️  キャッシュディレクトリ '{self.cache_dir}' をクリアしました")
+
+        self._ensure_cache_dir()
+        self._conn = self._open_database()
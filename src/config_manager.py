@@ -1,8 +1,6 @@
 from dataclasses import dataclass
 from typing import Any
 
-import yaml
-
 
 @dataclass
 class TargetConfig:
@@ -32,9 +30,18 @@ class ConfigManager:
 
     def _load_config(self) -> dict[str, Any]:
         """設定ファイルを読み込む"""
+        # 起動時間短縮のため yaml は実際に読み込むときにインポートする
+        import yaml
+
+        try:
+            # libyaml が利用可能なら C 実装のローダーを使う
+            from yaml import CSafeLoader as SafeLoader
+        except ImportError:
+            from yaml import SafeLoader
+
         try:
             with open(self.config_path, "r", encoding="utf-8") as file:
-                return yaml.safe_load(file)
+                return yaml.load(file, Loader=SafeLoader)
         except FileNotFoundError:
             raise FileNotFoundError(f"設定ファイルが見つかりません: {self.config_path}")
         except yaml.YAMLError as e:
@@ -1,16 +1,19 @@
 import click
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple
 
-from cache_manager import CacheManager
+from cache_manager import CacheManager, TrackEntry
 from config_manager import ConfigManager, TargetConfig
-from spotify_client import SpotifyClient
-from track_processor import TrackProcessor, TrackEntry
 
 
 class SpotifyTrackExtractor:
     """Spotifyから楽曲を抽出してプレイリストに追加するオーケストレータークラス"""
 
     def __init__(self, config_manager: ConfigManager, cache_dir: str = ".track_cache", use_cache: bool = True):
+        # spotipy (requests など) と tqdm は読み込みが重いため、--help では読み込まないよう遅延させる
+        from spotify_client import SpotifyClient
+        from track_processor import TrackProcessor
+        
         self.config_manager = config_manager
         auth_config = config_manager.get_auth_config()
         auth_dict = {
@@ -26,6 +29,10 @@ class SpotifyTrackExtractor:
         """アーティスト名を取得"""
         return self.spotify_client.get_artist_name(artist_id)
     
+    def get_artist_names(self, artist_ids: list[str]) -> dict[str, str]:
+        """複数アーティストの名前をまとめて取得"""
+        return self.spotify_client.get_artist_names_bulk(artist_ids)
+    
     def get_playlist_name(self, playlist_id: str) -> str:
         """プレイリスト名を取得"""
         return self.spotify_client.get_playlist_name(playlist_id)
@@ -39,9 +46,13 @@ class SpotifyTrackExtractor:
         all_tracks = self.track_processor.get_all_artist_tracks(artist_id)
         return self.track_processor.filter_tracks_by_keyword(all_tracks, keyword)
     
-    def add_tracks_to_playlist(self, playlist_id: str, track_ids: list[str]) -> None:
-        """プレイリストに曲を追加する"""
-        self.spotify_client.add_tracks_to_playlist(playlist_id, track_ids)
+    def get_new_tracks_for_playlist(self, tracks: list[TrackEntry], existing_track_ids: set[str]) -> list[TrackEntry]:
+        """プレイリストに存在しない新しい曲を取得"""
+        return self.track_processor.get_new_tracks_for_playlist(tracks, existing_track_ids)
+    
+    def add_tracks_to_playlist(self, playlist_id: str, track_ids: list[str]) -> list[str]:
+        """プレイリストに曲を追加し、実際に追加できた曲IDを返す"""
+        return self.spotify_client.add_tracks_to_playlist(playlist_id, track_ids)
     
     def clear_cache(self):
         """キャッシュをクリア"""
@@ -101,12 +112,10 @@ def print_track_list(tracks: List[TrackEntry], dry_run: bool, playlist_name: str
         print(f"{len(tracks)}曲の新しい曲を 「{playlist_name}」 に追加します...")
     
     for j, track in enumerate(tracks, 1):
-        track_name = track[1]
-        release_date = track[2]
         if verbose:
-            print(f"  {j:02}. {track_name} (リリース日: {release_date})")
+            print(f"  {j:02}. {track.name} (リリース日: {track.release_date})")
         elif j <= 5:
-            print(f"  {j:02}. {track_name}")
+            print(f"  {j:02}. {track.name}")
         elif j == 6:
             print(f"  ... and {len(tracks) - 5} more tracks")
 
@@ -114,35 +123,50 @@ def print_track_list(tracks: List[TrackEntry], dry_run: bool, playlist_name: str
 def process_single_target(extractor: SpotifyTrackExtractor, target: TargetConfig, 
                          dry_run: bool, verbose: bool) -> int:
     """単一のターゲットを処理し、追加された曲数を返す"""
+    # SpotifyTrackExtractor の生成時に読み込み済みのため、ここでの import は軽い
+    import spotipy
+    
     artist_name = extractor.get_artist_name(target.artist_id)
     playlist_name = extractor.get_playlist_name(target.playlist_id)
     
     print_target_info(artist_name, playlist_name, target.keyword, verbose)
     
-    # 既存のトラック取得
+    # 既存のトラック取得（アーティストの楽曲取得と並行してバックグラウンドで実行）
     print(f"プレイリスト「{playlist_name}」の楽曲情報を取得中...")
-    existing_tracks = extractor.get_all_playlist_tracks(target.playlist_id)
-    
-    # アーティストのトラック取得とフィルタリング
-    print(f"アーティスト「{artist_name}」の楽曲情報を取得中...（キーワード: '{target.keyword}'）")
-    filtered_tracks = extractor.get_artist_filtered_tracks(target.artist_id, target.keyword)
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        existing_tracks_future = executor.submit(extractor.get_all_playlist_tracks, target.playlist_id)
+        
+        # アーティストのトラック取得とフィルタリング
+        print(f"アーティスト「{artist_name}」の楽曲情報を取得中...（キーワード: '{target.keyword}'）")
+        filtered_tracks = extractor.get_artist_filtered_tracks(target.artist_id, target.keyword)
+        try:
+            existing_tracks = existing_tracks_future.result()
+        except spotipy.SpotifyException as e:
+            # 1つのプレイリストの取得失敗で残りのターゲットまで止めないよう、このターゲットだけ飛ばす
+            print(f"  ⚠️  プレイリスト「{playlist_name}」の楽曲情報を取得できないため、スキップします: {e}")
+            return 0
+    finally:
+        # エラーや Ctrl-C の際にバックグラウンドの取得完了を待たずに抜ける
+        executor.shutdown(wait=False, cancel_futures=True)
     
     # 新しいトラックの特定
-    new_tracks = [track for track in filtered_tracks if track[0] not in existing_tracks]
+    new_tracks = extractor.get_new_tracks_for_playlist(filtered_tracks, existing_tracks)
     
     if new_tracks:
         print_track_list(new_tracks, dry_run, playlist_name, verbose)
         
         if not dry_run:
-            extractor.add_tracks_to_playlist(target.playlist_id, [track[0] for track in new_tracks])
+            added_ids = extractor.add_tracks_to_playlist(target.playlist_id, [track.id for track in new_tracks])
             print("  ✅ プレイリストへの追加が完了しました")
         
-        # 詳細モードでは最終トラック数を表示
+        # 詳細モードでは最終トラック数を表示（取得済みのトラックIDから算出し再取得しない）
         if not dry_run and verbose:
-            final_track_count = len(extractor.get_all_playlist_tracks(target.playlist_id))
+            final_track_count = len(existing_tracks.union(added_ids))
             print(f"  📊 「{playlist_name}」 の最終トラック数: {final_track_count}")
         
-        return len(new_tracks)
+        # 追加に失敗したバッチの曲はサマリーの合計に含めない
+        return len(new_tracks) if dry_run else len(added_ids)
     else:
         print("  新しく追加する曲はありませんでした")
         return 0
@@ -199,6 +223,9 @@ def main(config: str, dry_run: bool, verbose: bool, cache_dir: str, clear_cache:
         config_manager, extractor = initialize_application(config, cache_dir, clear_cache, no_cache)
         targets = config_manager.get_targets()
         
+        # アーティスト名は一括取得しておき、ターゲットごとの API 呼び出しを省く
+        extractor.get_artist_names([target.artist_id for target in targets])
+        
         # 起動情報表示
         actual_cache_dir = cache_dir if not no_cache else f"{cache_dir}_disabled"
         print_startup_info(targets, actual_cache_dir, no_cache, dry_run)
@@ -2,12 +2,18 @@ import time
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 
+# プレイリスト取得で連続して失敗したときに諦めるまでの回数
+_MAX_PLAYLIST_FETCH_FAILURES = 3
+
 
 class SpotifyClient:
     """Spotify API操作を担当するクラス"""
 
     def __init__(self, auth_config: dict):
         self.sp = self._create_spotify_client(auth_config)
+        # 同一実行内での名前の再取得を避けるため、ID をキーにキャッシュする
+        self._artist_name_cache: dict[str, str] = {}
+        self._playlist_name_cache: dict[str, str] = {}
 
     def _create_spotify_client(self, config: dict) -> spotipy.Spotify:
         """Spotify クライアントを初期化する"""
@@ -22,17 +28,52 @@ class SpotifyClient:
 
     def get_artist_name(self, artist_id: str) -> str:
         """アーティスト名を取得"""
+        if artist_id in self._artist_name_cache:
+            return self._artist_name_cache[artist_id]
+
         try:
             artist = self.sp.artist(artist_id)
+            self._artist_name_cache[artist_id] = artist["name"]
             return artist["name"]
         except spotipy.SpotifyException as e:
             print(f"アーティスト情報の取得中にエラーが発生しました: {e}")
             return "不明なアーティスト"
 
+    def get_artist_names_bulk(self, artist_ids: list[str]) -> dict[str, str]:
+        """複数アーティストの名前をまとめて取得する（50件ずつバッチ処理）"""
+        pending_ids = list(
+            dict.fromkeys(
+                artist_id
+                for artist_id in artist_ids
+                if artist_id not in self._artist_name_cache
+            )
+        )
+        for i in range(0, len(pending_ids), 50):
+            batch = pending_ids[i : i + 50]
+            try:
+                response = self.sp.artists(batch)
+            except spotipy.SpotifyException as e:
+                print(f"アーティスト情報の取得中にエラーが発生しました: {e}")
+                continue
+
+            for artist in response["artists"]:
+                if artist:
+                    self._artist_name_cache[artist["id"]] = artist["name"]
+
+        return {
+            artist_id: self._artist_name_cache[artist_id]
+            for artist_id in artist_ids
+            if artist_id in self._artist_name_cache
+        }
+
     def get_playlist_name(self, playlist_id: str) -> str:
         """プレイリスト名を取得"""
+        if playlist_id in self._playlist_name_cache:
+            return self._playlist_name_cache[playlist_id]
+
         try:
             playlist = self.sp.playlist(playlist_id, fields="name")
+            self._playlist_name_cache[playlist_id] = playlist["name"]
             return playlist["name"]
         except spotipy.SpotifyException as e:
             print(f"プレイリスト情報の取得中にエラーが発生しました: {e}")
@@ -43,6 +84,7 @@ class SpotifyClient:
         tracks = set()
         offset = 0
         retrieved_items = 0
+        failures = 0
 
         while True:
             try:
@@ -62,8 +104,13 @@ class SpotifyClient:
                     break
 
                 offset += len(items)
+                failures = 0
             except spotipy.SpotifyException as e:
                 print(f"プレイリストトラックの取得中にエラーが発生しました: {e}")
+                # 存在しないプレイリストなど回復しないエラーで無限に再試行しないようにする
+                failures += 1
+                if failures >= _MAX_PLAYLIST_FETCH_FAILURES:
+                    raise
                 time.sleep(5)
 
         return tracks
@@ -141,8 +188,15 @@ class SpotifyClient:
 
         return all_tracks
 
-    def add_tracks_to_playlist(self, playlist_id: str, track_ids: list[str]) -> None:
-        """プレイリストに曲を追加する（100曲ずつバッチ処理）"""
+    def get_albums_batch(self, album_ids: list[str]) -> list[dict | None]:
+        """最大20件のアルバム情報（先頭50曲までのトラックを含む）をまとめて取得"""
+        return self.sp.albums(album_ids)["albums"]
+
+    def add_tracks_to_playlist(
+        self, playlist_id: str, track_ids: list[str]
+    ) -> list[str]:
+        """プレイリストに曲を追加し、実際に追加できた曲IDを返す（100曲ずつバッチ処理）"""
+        added_ids = []
         for i in range(0, len(track_ids), 100):
             batch = track_ids[i : i + 100]
             try:
@@ -150,3 +204,6 @@ class SpotifyClient:
             except spotipy.SpotifyException as e:
                 print(f"プレイリストへの曲の追加中にエラーが発生しました: {e}")
                 time.sleep(5)
+                continue
+            added_ids.extend(batch)
+        return added_ids
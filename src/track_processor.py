@@ -1,15 +1,22 @@
+import heapq
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import compress, repeat
+from operator import contains, itemgetter, not_
+from typing import Iterator
 
 import spotipy
 from tqdm import tqdm
 
-from boolean_parser import is_boolean_expression, parse_boolean_expression
-from cache_manager import CacheManager
+from boolean_parser import (
+    compile_matcher,
+    is_boolean_expression,
+    parse_boolean_expression,
+)
+from cache_manager import CacheManager, TrackEntry
 from spotify_client import SpotifyClient
 
-TrackEntry = tuple[str, str, str, str | None]
-
 
 class TrackProcessor:
     """トラック取得・処理・フィルタリングを担当するクラス"""
@@ -21,15 +28,30 @@ class TrackProcessor:
         use_cache: bool = True,
         cache_mode_album_limit: int = 20,
         full_fetch_album_limit: int = 50,
+        max_workers: int = 8,
     ):
         self.spotify_client = spotify_client
         self.cache_manager = cache_manager
         self.use_cache = use_cache
         self.cache_mode_album_limit = cache_mode_album_limit
         self.full_fetch_album_limit = full_fetch_album_limit
+        self.max_workers = max_workers
+        # 同じアーティストを複数のターゲットで扱う場合に、実行中は取得結果を
+        # 小文字化した曲名とあわせて使い回す
+        self._artist_tracks: dict[str, tuple[list[TrackEntry], list[str]]] = {}
 
     def get_all_artist_tracks(self, artist_id: str) -> list[TrackEntry]:
         """アーティストの全楽曲情報を取得（キャッシュ対応）"""
+        if artist_id not in self._artist_tracks:
+            tracks = self._load_artist_tracks(artist_id)
+            self._artist_tracks[artist_id] = (
+                tracks,
+                [track[1].lower() for track in tracks],
+            )
+        return self._artist_tracks[artist_id][0]
+
+    def _load_artist_tracks(self, artist_id: str) -> list[TrackEntry]:
+        """キャッシュまたは API からアーティストの全楽曲情報を読み込む"""
         if not self.use_cache:
             return self._get_all_tracks_from_api(artist_id)
 
@@ -40,17 +62,22 @@ class TrackProcessor:
                 f"💾 キャッシュから楽曲情報を読み込みました ({len(cached_tracks)} 曲)"
             )
 
-            cached_album_ids = self._extract_album_ids_from_tracks(cached_tracks)
+            cached_album_ids = self.cache_manager.load_album_ids(
+                artist_id
+            ) or self._extract_album_ids_from_tracks(cached_tracks)
             new_tracks = self._get_new_tracks_since(
                 artist_id, last_updated, cached_album_ids
             )
             if new_tracks:
                 print(f"🆕 新しい楽曲を {len(new_tracks)} 曲発見しました")
-                updated_tracks = self._merge_tracks(cached_tracks, new_tracks)
-                if updated_tracks != cached_tracks:
-                    self.cache_manager.save_tracks(artist_id, updated_tracks)
+                updated_tracks, added_count = self._merge_tracks(
+                    cached_tracks, new_tracks
+                )
+                if added_count > 0:
+                    # キャッシュは楽曲単位で upsert されるため、新たに取得した分だけ書き込む
+                    self.cache_manager.save_tracks(artist_id, new_tracks)
                     print(
-                        f"💾 楽曲情報を更新しました (新規追加: {len(updated_tracks) - len(cached_tracks)} 曲, 合計: {len(updated_tracks)} 曲)"
+                        f"💾 楽曲情報を更新しました (新規追加: {added_count} 曲, 合計: {len(updated_tracks)} 曲)"
                     )
                     return updated_tracks
                 else:
@@ -70,26 +97,28 @@ class TrackProcessor:
         self,
         cached_tracks: list[TrackEntry],
         new_tracks: list[TrackEntry],
-    ) -> list[TrackEntry]:
-        """キャッシュされたトラックと新しいトラックをマージ（重複削除）"""
+    ) -> tuple[list[TrackEntry], int]:
+        """キャッシュされたトラックと新しいトラックをマージ（重複削除）
+
+        (マージ結果, 追加した曲数) を返す
+        """
         existing_ids = {track[0] for track in cached_tracks}
         unique_new_tracks = [
             track for track in new_tracks if track[0] not in existing_ids
         ]
 
         if unique_new_tracks:
-            all_tracks = cached_tracks + unique_new_tracks
-            all_tracks.sort(key=lambda x: x[2], reverse=False)  # リリース日順にソート
-            return all_tracks
-        return cached_tracks
+            # どちらもリリース日順に並んでいるため、全体を再ソートせずにマージする
+            unique_new_tracks.sort(key=itemgetter(2))
+            merged = list(
+                heapq.merge(cached_tracks, unique_new_tracks, key=itemgetter(2))
+            )
+            return merged, len(unique_new_tracks)
+        return cached_tracks, 0
 
     def _extract_album_ids_from_tracks(self, tracks: list[TrackEntry]) -> set[str]:
         """トラック情報からアルバムID集合を抽出"""
-        album_ids: set[str] = set()
-        for track in tracks:
-            if len(track) >= 4 and track[3]:
-                album_ids.add(track[3])  # type: ignore[index]
-        return album_ids
+        return {track[3] for track in tracks if track[3]}
 
     def _get_new_tracks_since(
         self, artist_id: str, last_updated: str, known_album_ids: set[str]
@@ -124,47 +153,88 @@ class TrackProcessor:
 
     def _extract_tracks_from_albums(self, albums: list[dict]) -> list[TrackEntry]:
         """アルバムリストからトラック情報を抽出"""
-        all_tracks: list[tuple[str, str, str, str | None]] = []
-
-        for album in tqdm(albums, desc="アルバム処理中", unit="album"):
-            try:
-                album_id = album.get("id")
-                release_date = album["release_date"]
-                album_tracks = self.spotify_client.get_album_tracks(album["id"])
-
-                for track in album_tracks:
-                    all_tracks.append(
-                        (track["id"], track["name"], release_date, album_id)
-                    )
-
-            except spotipy.SpotifyException as e:
-                print(
-                    f"\nアルバム 「{album['name']}」 のトラック取得中にエラーが発生しました: {e}"
-                )
-                time.sleep(5)
+        return list(self._iter_tracks_from_albums(albums))
+
+    def _iter_tracks_from_albums(self, albums: list[dict]) -> Iterator[TrackEntry]:
+        """アルバムリストからトラック情報をリリース日順に1曲ずつ生成する"""
+        # 同じアルバムの楽曲はリリース日が共通なので、楽曲ではなくアルバムを
+        # リリース日順に並べておけば、生成される楽曲もリリース日順になる
+        albums = sorted(albums, key=lambda album: album["release_date"])
+
+        # アルバムは20件ずつまとめて取得し、通信待ちが大半なので各バッチを並列に処理する
+        # （executor.map は入力順に結果を返すため、リリース日順は保たれる）
+        batches = [albums[i : i + 20] for i in range(0, len(albums), 20)]
+        get_id_and_name = itemgetter("id", "name")
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            with tqdm(total=len(albums), desc="アルバム処理中", unit="album") as progress:
+                results = executor.map(self._fetch_album_batch, batches)
+                for batch, batch_tracks in zip(batches, results):
+                    for album, album_tracks in zip(batch, batch_tracks):
+                        if album_tracks is None:
+                            continue
+
+                        album_id = album["id"]
+                        release_date = album["release_date"]
+                        # ID と曲名の取り出しは itemgetter でまとめて C レベルで行う
+                        for track_id, name in map(get_id_and_name, album_tracks):
+                            yield TrackEntry(track_id, name, release_date, album_id)
+                    progress.update(len(batch))
+        finally:
+            # エラーや Ctrl-C の際は未着手のバッチを取り消し、完了を待たずに抜ける
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch_album_batch(self, albums: list[dict]) -> list[list[dict] | None]:
+        """最大20件のアルバムのトラックをまとめて取得（取得できない分は個別に取得）"""
+        try:
+            full_albums = self.spotify_client.get_albums_batch(
+                [album["id"] for album in albums]
+            )
+        except spotipy.SpotifyException as e:
+            print(f"\nアルバム情報の一括取得中にエラーが発生しました: {e}")
+            return [self._fetch_album_tracks(album) for album in albums]
+
+        batch_tracks = []
+        for album, full_album in zip(albums, full_albums):
+            # 50曲を超えるアルバムは残りのページがあるため個別に取得する
+            if full_album is None or full_album["tracks"]["next"]:
+                batch_tracks.append(self._fetch_album_tracks(album))
+            else:
+                batch_tracks.append(full_album["tracks"]["items"])
+        return batch_tracks
 
-        all_tracks.sort(key=lambda x: x[2], reverse=False)  # リリース日順にソート
-        return all_tracks
+    def _fetch_album_tracks(self, album: dict) -> list[dict] | None:
+        """アルバムのトラックを取得（エラー時は None を返す）"""
+        try:
+            return self.spotify_client.get_album_tracks(album["id"])
+        except spotipy.SpotifyException as e:
+            print(
+                f"\nアルバム 「{album['name']}」 のトラック取得中にエラーが発生しました: {e}"
+            )
+            time.sleep(5)
+            return None
 
     def filter_tracks_by_keyword(
         self, tracks: list[TrackEntry], keyword: str
     ) -> list[TrackEntry]:
         """キーワードまたはブール式でトラックをフィルタリング"""
+        lower_names = self._get_lower_names(tracks)
         try:
             if is_boolean_expression(keyword):
-                # ブール式として処理
+                # ブール式として処理（式は一度だけコンパイルする）
                 expression = parse_boolean_expression(keyword)
+                matcher = compile_matcher(expression)
                 filtered_tracks = [
-                    track for track in tracks if expression.evaluate(track[1])
+                    track for track, name in zip(tracks, lower_names) if matcher(name)
                 ]
                 print(
                     f"🔍 ブール式 '{keyword}' に一致する楽曲を {len(filtered_tracks)} 曲見つけました"
                 )
             else:
                 # 従来の単純な文字列検索
-                filtered_tracks = [
-                    track for track in tracks if keyword.lower() in track[1].lower()
-                ]
+                filtered_tracks = self._filter_by_substring(
+                    tracks, lower_names, keyword
+                )
                 print(
                     f"🔍 キーワード '{keyword}' に一致する楽曲を {len(filtered_tracks)} 曲見つけました"
                 )
@@ -175,36 +245,54 @@ class TrackProcessor:
             print(f"❌ ブール式の解析エラー: {e}")
             print("💡 単純なキーワード検索として処理します")
             # エラーの場合は従来の検索にフォールバック
-            filtered_tracks = [
-                track for track in tracks if keyword.lower() in track[1].lower()
-            ]
+            filtered_tracks = self._filter_by_substring(tracks, lower_names, keyword)
             print(
                 f"🔍 キーワード '{keyword}' に一致する楽曲を {len(filtered_tracks)} 曲見つけました"
             )
             return filtered_tracks
 
+    def _filter_by_substring(
+        self, tracks: list[TrackEntry], lower_names: list[str], keyword: str
+    ) -> list[TrackEntry]:
+        """小文字化した曲名にキーワードを含むトラックを抽出"""
+        # 部分文字列の判定と抽出を組み込み関数で連結し、C レベルでループさせる
+        matches = map(contains, lower_names, repeat(keyword.lower()))
+        return list(compress(tracks, matches))
+
+    def _get_lower_names(self, tracks: list[TrackEntry]) -> list[str]:
+        """曲名を小文字化したリストを取得（アーティストの全楽曲には保持済みのものを使う）"""
+        for artist_tracks, lower_names in self._artist_tracks.values():
+            if artist_tracks is tracks:
+                return lower_names
+
+        return [track[1].lower() for track in tracks]
+
     def get_new_tracks_for_playlist(
         self, tracks: list[TrackEntry], existing_track_ids: set[str]
     ) -> list[TrackEntry]:
         """プレイリストに存在しない新しいトラックを取得"""
-        return [track for track in tracks if track[0] not in existing_track_ids]
+        # ID の取り出しから所属判定までを組み込み関数で連結し、C レベルでループさせる
+        is_new = map(
+            not_, map(existing_track_ids.__contains__, map(itemgetter(0), tracks))
+        )
+        return list(compress(tracks, is_new))
 
     def _parse_release_date(self, release_date: str | None) -> datetime | None:
         """Spotifyのrelease_date文字列をdatetimeに変換"""
         if not release_date:
             return None
 
-        normalized = release_date
+        length = len(release_date)
         try:
-            if len(release_date) == 4:  # YYYY
-                normalized = f"{release_date}-01-01"
-            elif len(release_date) == 7:  # YYYY-MM
-                normalized = f"{release_date}-01"
-
-            if len(normalized) == 10:  # YYYY-MM-DD
-                normalized = f"{normalized}T00:00:00"
-
-            normalized = normalized.replace("Z", "+00:00")
-            return datetime.fromisoformat(normalized)
+            if length in (4, 7, 10):  # YYYY / YYYY-MM / YYYY-MM-DD
+                year = int(release_date[:4])
+                month = int(release_date[5:7]) if length >= 7 else 1
+                day = int(release_date[8:10]) if length == 10 else 1
+                return datetime(year, month, day)
+
+            # 時刻を含む文字列（キャッシュの last_updated など）は ISO 形式として解釈する
+            if release_date.endswith("Z"):
+                release_date = release_date[:-1] + "+00:00"
+            return datetime.fromisoformat(release_date)
         except ValueError:
             return None